@@ -1,33 +1,16 @@
 import os
 from pathlib import Path
-import pandas as pd
+import altair as alt
+import numpy as np
 import streamlit as st
 import plotly.graph_objects as go
 import plotly.express as px
 
+from common import filter_data, impact_totals, load_data, table_slice, to_csv_bytes, top_totals, with_modeled
+
 st.set_page_config(page_title="IL Income Tax LGDF Dashboard", layout="wide")
 st.title("Illinois Income Tax (INC) — Municipality LGDF Modeling Dashboard")
 
-# ---------------------------------------------------
-# ACTUAL EFFECTIVE LGDF RATES BY FISCAL YEAR
-# ---------------------------------------------------
-ACTUAL_EFFECTIVE_RATES = {
-    2012: 6.00,
-    2013: 6.00,
-    2014: 6.00,
-    2015: 6.00,
-    2016: 8.00,
-    2017: 8.00,
-    2018: 5.45,
-    2019: 5.75,
-    2020: 5.75,
-    2021: 6.06,
-    2022: 6.06,
-    2023: 6.16,
-    2024: 6.47,
-    2025: 6.47,
-}
-
 # ---------------------------------------------------
 # DATA LOADING
 # ---------------------------------------------------
@@ -37,27 +20,12 @@ if not DATA_PATH.exists():
     st.error("CSV file not found. Make sure il_income_tax_INC_only_fy2012_2025.csv is in the same folder as app.py.")
     st.stop()
 
-
-@st.cache_data
-def load_data(path):
-    df = pd.read_csv(path)
-    df.columns = [c.strip().lower() for c in df.columns]
-    df["fy"] = pd.to_numeric(df["fy"], errors="coerce")
-    df["fy_total"] = pd.to_numeric(df["fy_total"], errors="coerce")
-    df["local_government"] = df["local_government"].astype(str).str.strip()
-    df["tax"] = df["tax"].astype(str).str.strip().str.upper()
-    df = df.dropna(subset=["fy", "fy_total"])
-    df["fy"] = df["fy"].astype(int)
-    df = df[df["tax"] == "INC"].copy()
-    return df.sort_values(["local_government", "fy"])
-
-
-df = load_data(DATA_PATH)
+df, municipality_names, years, min_year, max_year = load_data(DATA_PATH)
 
 # ---------------------------------------------------
 # MODELED RATE CONTROL
 # ---------------------------------------------------
-st.success(f"Loaded {len(df)} rows | {df['local_government'].nunique()} municipalities")
+st.success(f"Loaded {len(df)} rows | {len(municipality_names)} municipalities")
 
 st.header("LGDF Rate Modeling")
 st.write("Use the slider below to set the modeled LGDF effective rate and compare against actual collections.")
@@ -74,15 +42,6 @@ modeled_rate = st.slider(
 st.info(f"Currently modeling at **{modeled_rate:.2f}%**. Drag the slider above to change it.")
 st.markdown("---")
 
-# ---------------------------------------------------
-# COMPUTE MODELED COLUMNS
-# ---------------------------------------------------
-df["actual_rate"] = df["fy"].map(ACTUAL_EFFECTIVE_RATES)
-df["modeled_collection"] = df["fy_total"] * (modeled_rate / df["actual_rate"])
-df["forgone_revenue"] = df["modeled_collection"] - df["fy_total"]
-df["forgone_revenue"] = df["forgone_revenue"].clip(lower=0)
-df["modeled_collection"] = df[["fy_total", "modeled_collection"]].max(axis=1)
-
 # ---------------------------------------------------
 # TABS
 # ---------------------------------------------------
@@ -90,117 +49,181 @@ tab_bar, tab_chart, tab_top, tab_table = st.tabs(
     ["Bar Chart — Forgone Revenue", "Line Chart", "Top Municipalities", "Data Table"]
 )
 
-municipalities = ["All Municipalities"] + sorted(df["local_government"].unique())
-min_year = int(df["fy"].min())
-max_year = int(df["fy"].max())
-
-
-def filter_data(dataframe, muni, year_range):
-    """Filter by municipality and year range. If 'All Municipalities', aggregate by year."""
-    filtered = dataframe[dataframe["fy"].between(year_range[0], year_range[1])].copy()
-    if muni == "All Municipalities":
-        agg = filtered.groupby("fy", as_index=False).agg(
-            fy_total=("fy_total", "sum"),
-            modeled_collection=("modeled_collection", "sum"),
-            forgone_revenue=("forgone_revenue", "sum"),
-        )
-        agg["actual_rate"] = agg["fy"].map(ACTUAL_EFFECTIVE_RATES)
-        agg["local_government"] = "All Municipalities"
-        return agg
-    else:
-        return filtered[filtered["local_government"] == muni].copy()
-
-
-# ===================================================
-# BAR CHART TAB
-# ===================================================
-with tab_bar:
-    col_muni2, col_years2 = st.columns([1, 2])
-    with col_muni2:
-        muni_bar = st.selectbox("Select Municipality", municipalities, key="muni_bar")
-    with col_years2:
-        year_range_bar = st.slider(
-            "Select Year Range",
-            min_year,
-            max_year,
-            (min_year, max_year),
-            key="yr_bar",
-        )
+municipalities = ["All Municipalities"] + municipality_names
 
-    d2 = filter_data(df, muni_bar, year_range_bar)
+# One year range drives every tab, so only one range is sliced per rerun
+year_range = st.sidebar.slider(
+    "Select Year Range",
+    min_year,
+    max_year,
+    (min_year, max_year),
+    key="yr_shared",
+)
 
-    fig_bar = go.Figure()
 
-    fig_bar.add_trace(
+# ---------------------------------------------------
+# FIGURE SHELLS
+# ---------------------------------------------------
+# Traces and static layout are built once; each rerun gets a fresh copy from the
+# cache and only swaps in the data arrays and titles.
+@st.cache_data
+def make_bar_fig():
+    fig = go.Figure()
+    fig.add_trace(
         go.Bar(
-            x=d2["fy"],
-            y=d2["fy_total"],
             name="Actual Collection",
             marker_color="rgba(124, 179, 66, 0.5)",
-            text=d2["fy_total"].apply(lambda v: f"${v:,.0f}"),
             textposition="inside",
             hovertemplate="FY %{x}<br>Actual: $%{y:,.0f}<extra></extra>",
         )
     )
-
-    fig_bar.add_trace(
+    fig.add_trace(
         go.Bar(
-            x=d2["fy"],
-            y=d2["forgone_revenue"],
             name="Forgone Revenue",
             marker_color="rgba(76, 175, 80, 0.9)",
-            text=d2["forgone_revenue"].apply(lambda v: f"${v:,.0f}"),
             textposition="inside",
             hovertemplate="FY %{x}<br>Forgone: $%{y:,.0f}<extra></extra>",
         )
     )
-
-    fig_bar.add_trace(
+    fig.add_trace(
         go.Scatter(
-            x=d2["fy"],
-            y=d2["modeled_collection"],
+            name="Modeled Collection",
             mode="text",
-            text=d2["modeled_collection"].apply(lambda v: f"${v:,.0f}"),
             textposition="top center",
             textfont=dict(size=11, color="black"),
             showlegend=False,
             hoverinfo="skip",
         )
     )
-
-    fig_bar.update_layout(
+    fig.update_layout(
         barmode="stack",
-        title=f"{muni_bar} — LGDF Modeling (Modeled Rate: {modeled_rate:.1f}%)",
         xaxis_title="Fiscal Year",
         yaxis_title="Collection ($)",
         yaxis_tickformat=",.0f",
         xaxis_dtick=1,
         legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
     )
+    return fig
 
-    st.plotly_chart(fig_bar, use_container_width=True)
+
+@st.cache_data
+def make_top_fig():
+    fig = go.Figure()
+    fig.add_trace(
+        go.Bar(
+            name="Actual Collection",
+            orientation="h",
+            marker_color="rgba(124, 179, 66, 0.5)",
+            hovertemplate="%{y}<br>Actual: $%{x:,.0f}<extra></extra>",
+        )
+    )
+    fig.add_trace(
+        go.Bar(
+            name="Forgone Revenue",
+            orientation="h",
+            marker_color="rgba(76, 175, 80, 0.9)",
+            hovertemplate="%{y}<br>Forgone: $%{x:,.0f}<extra></extra>",
+        )
+    )
+    fig.update_layout(
+        barmode="stack",
+        xaxis_title="Total Collection ($)",
+        xaxis_tickformat=",.0f",
+        yaxis_title="",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
+        margin=dict(l=200),
+    )
+    return fig
+
+
+def make_line_chart(d, title, modeled_label):
+    """Actual vs modeled collection as a Vega-Lite line chart (smaller payload than a Plotly figure)."""
+    series = ["Actual Collection", modeled_label]
+    long = d[["fy", "fy_total", "modeled_collection"]].rename(
+        columns={"fy_total": series[0], "modeled_collection": series[1]}
+    ).melt("fy", var_name="Series", value_name="Collection")
+    return (
+        alt.Chart(long, title=title)
+        .mark_line(point=alt.OverlayMarkDef(size=64, filled=True))
+        .encode(
+            x=alt.X("fy:O", title="Fiscal Year", axis=alt.Axis(labelAngle=0)),
+            y=alt.Y("Collection:Q", title="Collection ($)", axis=alt.Axis(format=",.0f")),
+            color=alt.Color(
+                "Series:N",
+                scale=alt.Scale(domain=series, range=["#7cb342", "#1565c0"]),
+                legend=alt.Legend(orient="top", title=None),
+            ),
+            strokeDash=alt.StrokeDash("Series:N", scale=alt.Scale(domain=series, range=[[1, 0], [6, 4]]), legend=None),
+            shape=alt.Shape("Series:N", scale=alt.Scale(domain=series, range=["circle", "diamond"]), legend=None),
+            tooltip=[
+                alt.Tooltip("fy:O", title="FY"),
+                alt.Tooltip("Series:N"),
+                alt.Tooltip("Collection:Q", format="$,.0f"),
+            ],
+        )
+    )
+
+
+# ===================================================
+# BAR CHART TAB
+# ===================================================
+@st.fragment
+def render_bar_tab(df, modeled_rate, year_range_bar):
+    muni_bar = st.selectbox("Select Municipality", municipalities, key="muni_bar")
+
+    d2 = filter_data(df, muni_bar, year_range_bar, modeled_rate)
+
+    # Plain numpy arrays go out as typed arrays instead of per-element JSON lists
+    fy_bar = d2["fy"].to_numpy(np.int32)
+    actual_bar = d2["fy_total"].to_numpy(np.float64)
+    forgone_bar = d2["forgone_revenue"].to_numpy(np.float64)
+    modeled_bar = d2["modeled_collection"].to_numpy(np.float64)
+
+    fig_bar = make_bar_fig()
+    fig_bar.update_traces(
+        x=fy_bar,
+        y=actual_bar,
+        text=[f"${v:,.0f}" for v in actual_bar],
+        selector=dict(name="Actual Collection"),
+    )
+    fig_bar.update_traces(
+        x=fy_bar,
+        y=forgone_bar,
+        text=[f"${v:,.0f}" for v in forgone_bar],
+        selector=dict(name="Forgone Revenue"),
+    )
+    fig_bar.update_traces(
+        x=fy_bar,
+        y=modeled_bar,
+        text=[f"${v:,.0f}" for v in modeled_bar],
+        selector=dict(name="Modeled Collection"),
+    )
+    fig_bar.update_layout(
+        title=f"{muni_bar} — LGDF Modeling (Modeled Rate: {modeled_rate:.1f}%)",
+        # Zoom survives rate and range changes but resets with the municipality's scale
+        uirevision=muni_bar,
+    )
+
+    st.plotly_chart(fig_bar, use_container_width=True, key="bar_fig")
 
     st.subheader("Forgone Revenue Impact")
     col1b, col2b, col3b, col4b = st.columns(4)
-    sorted_d2 = d2.sort_values("fy", ascending=False)
+    latest, three, five, total = impact_totals(d2)
 
     with col1b:
-        latest = sorted_d2["forgone_revenue"].iloc[0] if len(sorted_d2) > 0 else 0
         st.metric("1-Year Impact", f"${latest:,.0f}")
     with col2b:
-        three = sorted_d2.head(3)["forgone_revenue"].sum() if len(sorted_d2) >= 3 else sorted_d2["forgone_revenue"].sum()
         st.metric("3-Year Impact", f"${three:,.0f}")
     with col3b:
-        five = sorted_d2.head(5)["forgone_revenue"].sum() if len(sorted_d2) >= 5 else sorted_d2["forgone_revenue"].sum()
         st.metric("5-Year Impact", f"${five:,.0f}")
     with col4b:
-        total = d2["forgone_revenue"].sum()
         st.metric("Total Impact", f"${total:,.0f}")
 
     st.subheader("Rate Comparison")
-    rate_table = d2[["fy", "actual_rate", "fy_total", "modeled_collection", "forgone_revenue"]].copy()
-    rate_table["modeled_rate"] = modeled_rate
-    rate_table["rate_difference"] = modeled_rate - rate_table["actual_rate"]
+    rate_table = d2[["fy", "actual_rate", "fy_total", "modeled_collection", "forgone_revenue"]].assign(
+        modeled_rate=modeled_rate,
+        rate_difference=modeled_rate - d2["actual_rate"],
+    )
     rate_table.columns = [
         "Fiscal Year",
         "Actual Effective Rate (%)",
@@ -223,143 +246,101 @@ with tab_bar:
     ].sort_values("Fiscal Year", ascending=False)
 
     st.dataframe(
-        rate_table.style.format(
-            {
-                "Modeled Rate (%)": "{:.2f}%",
-                "Actual Effective Rate (%)": "{:.2f}%",
-                "Rate Difference (%)": "{:.2f}%",
-                "Actual Collection": "${:,.0f}",
-                "Modeled Collection": "${:,.0f}",
-                "Forgone Revenue": "${:,.0f}",
-            }
-        ),
+        rate_table,
         use_container_width=True,
         hide_index=True,
+        column_config={
+            "Modeled Rate (%)": st.column_config.NumberColumn(format="%.2f%%"),
+            "Actual Effective Rate (%)": st.column_config.NumberColumn(format="%.2f%%"),
+            "Rate Difference (%)": st.column_config.NumberColumn(format="%.2f%%"),
+            "Actual Collection": st.column_config.NumberColumn(format="$%,.0f"),
+            "Modeled Collection": st.column_config.NumberColumn(format="$%,.0f"),
+            "Forgone Revenue": st.column_config.NumberColumn(format="$%,.0f"),
+        },
     )
 
+    # The callable runs only when the button is clicked, so reruns skip serialization
     st.download_button(
         "Download Bar Chart Data",
-        d2[["local_government", "fy", "actual_rate", "fy_total", "modeled_collection", "forgone_revenue"]]
-        .to_csv(index=False)
-        .encode("utf-8"),
+        lambda: to_csv_bytes(
+            d2[["local_government", "fy", "actual_rate", "fy_total", "modeled_collection", "forgone_revenue"]],
+            "bar",
+            muni_bar,
+            year_range_bar,
+            modeled_rate,
+        ),
         file_name=f"{muni_bar}_lgdf_bar_data.csv",
         mime="text/csv",
     )
 
 
+with tab_bar:
+    render_bar_tab(df, modeled_rate, year_range)
+
+
 # ===================================================
 # LINE CHART TAB
 # ===================================================
-with tab_chart:
-    col_muni, col_years = st.columns([1, 2])
-    with col_muni:
-        muni_line = st.selectbox("Select Municipality", municipalities, key="muni_line")
-    with col_years:
-        year_range_line = st.slider(
-            "Select Year Range",
-            min_year,
-            max_year,
-            (min_year, max_year),
-            key="yr_line",
-        )
-
-    d = filter_data(df, muni_line, year_range_line)
-
-    fig_line = go.Figure()
-
-    fig_line.add_trace(
-        go.Scatter(
-            x=d["fy"],
-            y=d["fy_total"],
-            mode="lines+markers",
-            name="Actual Collection",
-            line=dict(color="#7cb342", width=2),
-            marker=dict(size=8),
-            hovertemplate="FY %{x}<br>Actual: $%{y:,.0f}<extra></extra>",
-        )
-    )
+@st.fragment
+def render_line_tab(df, modeled_rate, year_range_line):
+    muni_line = st.selectbox("Select Municipality", municipalities, key="muni_line")
 
-    fig_line.add_trace(
-        go.Scatter(
-            x=d["fy"],
-            y=d["modeled_collection"],
-            mode="lines+markers",
-            name=f"Modeled Collection ({modeled_rate:.1f}%)",
-            line=dict(color="#1565c0", width=2, dash="dash"),
-            marker=dict(size=8, symbol="diamond"),
-            hovertemplate="FY %{x}<br>Modeled: $%{y:,.0f}<extra></extra>",
-        )
-    )
+    d = filter_data(df, muni_line, year_range_line, modeled_rate)
 
-    fig_line.update_layout(
-        title=f"{muni_line} — Actual vs Modeled LGDF Collection",
-        xaxis_title="Fiscal Year",
-        yaxis_title="Collection ($)",
-        yaxis_tickformat=",.0f",
-        xaxis_dtick=1,
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
-        hovermode="x unified",
+    line_chart = make_line_chart(
+        d,
+        f"{muni_line} — Actual vs Modeled LGDF Collection",
+        f"Modeled Collection ({modeled_rate:.1f}%)",
     )
 
-    st.plotly_chart(fig_line, use_container_width=True)
+    st.altair_chart(line_chart, use_container_width=True)
 
     st.subheader("Forgone Revenue Impact")
     col1, col2, col3, col4 = st.columns(4)
-    sorted_d = d.sort_values("fy", ascending=False)
+    latest_forgone, three_yr, five_yr, total_forgone = impact_totals(d)
 
     with col1:
-        latest_forgone = sorted_d["forgone_revenue"].iloc[0] if len(sorted_d) > 0 else 0
         st.metric("1-Year Impact", f"${latest_forgone:,.0f}")
     with col2:
-        three_yr = sorted_d.head(3)["forgone_revenue"].sum() if len(sorted_d) >= 3 else sorted_d["forgone_revenue"].sum()
         st.metric("3-Year Impact", f"${three_yr:,.0f}")
     with col3:
-        five_yr = sorted_d.head(5)["forgone_revenue"].sum() if len(sorted_d) >= 5 else sorted_d["forgone_revenue"].sum()
         st.metric("5-Year Impact", f"${five_yr:,.0f}")
     with col4:
-        total_forgone = d["forgone_revenue"].sum()
         st.metric("Total Impact", f"${total_forgone:,.0f}")
 
     st.download_button(
         "Download Chart Data",
-        d[["local_government", "fy", "fy_total", "actual_rate", "modeled_collection", "forgone_revenue"]]
-        .to_csv(index=False)
-        .encode("utf-8"),
+        lambda: to_csv_bytes(
+            d[["local_government", "fy", "fy_total", "actual_rate", "modeled_collection", "forgone_revenue"]],
+            "line",
+            muni_line,
+            year_range_line,
+            modeled_rate,
+        ),
         file_name=f"{muni_line}_lgdf_line_data.csv",
         mime="text/csv",
     )
 
 
+with tab_chart:
+    render_line_tab(df, modeled_rate, year_range)
+
+
 # ===================================================
 # TOP MUNICIPALITIES TAB
 # ===================================================
-with tab_top:
+@st.fragment
+def render_top_tab(df, modeled_rate, year_range_top):
     st.subheader("Top Municipalities by Total Forgone Revenue")
 
-    top_col1, top_col2 = st.columns([1, 2])
-    with top_col1:
-        top_n = st.selectbox(
-            "Show Top",
-            [10, 25, 50, 100, 250],
-            index=1,
-            key="top_n",
-        )
-    with top_col2:
-        year_range_top = st.slider(
-            "Select Year Range",
-            min_year,
-            max_year,
-            (min_year, max_year),
-            key="yr_top",
-        )
-
-    filtered_top = df[df["fy"].between(year_range_top[0], year_range_top[1])]
+    top_n = st.selectbox(
+        "Show Top",
+        [10, 25, 50, 100, 250],
+        index=1,
+        key="top_n",
+    )
 
-    muni_totals = filtered_top.groupby("local_government", as_index=False).agg(
-        total_actual=("fy_total", "sum"),
-        total_modeled=("modeled_collection", "sum"),
-        total_forgone=("forgone_revenue", "sum"),
-    ).sort_values("total_forgone", ascending=False)
+    muni_totals = top_totals(df, year_range_top[0], year_range_top[1], modeled_rate)
 
     grand_total = muni_totals["total_forgone"].sum()
     grand_actual = muni_totals["total_actual"].sum()
@@ -376,44 +357,32 @@ with tab_top:
     top_munis = muni_totals.head(top_n)
 
     # Horizontal bar chart — easier to read municipality names
-    fig_top = go.Figure()
-
-    fig_top.add_trace(
-        go.Bar(
-            y=top_munis["local_government"].iloc[::-1],
-            x=top_munis["total_actual"].iloc[::-1],
-            name="Actual Collection",
-            orientation="h",
-            marker_color="rgba(124, 179, 66, 0.5)",
-            hovertemplate="%{y}<br>Actual: $%{x:,.0f}<extra></extra>",
-        )
+    names_top = top_munis["local_government"].to_numpy()[::-1]
+    fig_top = make_top_fig()
+    fig_top.update_traces(
+        y=names_top,
+        x=top_munis["total_actual"].to_numpy(np.float64)[::-1],
+        selector=dict(name="Actual Collection"),
     )
-
-    fig_top.add_trace(
-        go.Bar(
-            y=top_munis["local_government"].iloc[::-1],
-            x=top_munis["total_forgone"].iloc[::-1],
-            name="Forgone Revenue",
-            orientation="h",
-            marker_color="rgba(76, 175, 80, 0.9)",
-            hovertemplate="%{y}<br>Forgone: $%{x:,.0f}<extra></extra>",
-        )
+    fig_top.update_traces(
+        y=names_top,
+        x=top_munis["total_forgone"].to_numpy(np.float64)[::-1],
+        selector=dict(name="Forgone Revenue"),
     )
-
-    chart_height = max(500, top_n * 22)
-
     fig_top.update_layout(
-        barmode="stack",
         title=f"Top {top_n} Municipalities — Total Forgone Revenue ({year_range_top[0]}–{year_range_top[1]})",
-        xaxis_title="Total Collection ($)",
-        xaxis_tickformat=",.0f",
-        yaxis_title="",
-        height=chart_height,
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
-        margin=dict(l=200),
+        height=min(max(500, top_n * 22), 4000),
+        # Zoom survives rate and range changes but resets when the number of bars changes
+        uirevision=top_n,
     )
+    top_config = {"responsive": True}
+    if top_n >= 100:
+        # Per-bar hover handlers and the mode bar dominate redraw cost at this size
+        fig_top.update_traces(hoverinfo="skip")
+        fig_top.update_layout(hovermode=False)
+        top_config["displayModeBar"] = False
 
-    st.plotly_chart(fig_top, use_container_width=True)
+    st.plotly_chart(fig_top, use_container_width=True, key="top_fig", config=top_config)
 
     # Full ranking table
     st.subheader(f"Top {top_n} — Detailed Ranking")
@@ -428,65 +397,87 @@ with tab_top:
     ]
 
     st.dataframe(
-        display_top.style.format(
-            {
-                "Total Actual Collection": "${:,.0f}",
-                "Total Modeled Collection": "${:,.0f}",
-                "Total Forgone Revenue": "${:,.0f}",
-            }
-        ),
+        display_top,
         use_container_width=True,
         height=min(650, top_n * 38 + 50),
+        column_config={
+            "Total Actual Collection": st.column_config.NumberColumn(format="$%,.0f"),
+            "Total Modeled Collection": st.column_config.NumberColumn(format="$%,.0f"),
+            "Total Forgone Revenue": st.column_config.NumberColumn(format="$%,.0f"),
+        },
     )
 
     st.download_button(
         f"Download Top {top_n} Municipalities",
-        muni_totals.to_csv(index=False).encode("utf-8"),
+        lambda: to_csv_bytes(muni_totals, "top", year_range_top, modeled_rate),
         file_name=f"top_municipalities_forgone_revenue_{year_range_top[0]}_{year_range_top[1]}.csv",
         mime="text/csv",
     )
 
 
+with tab_top:
+    render_top_tab(df, modeled_rate, year_range)
+
+
 # ===================================================
 # TABLE TAB
 # ===================================================
-with tab_table:
-    years = sorted(df["fy"].unique())
-    year = st.selectbox("Select Fiscal Year", years, index=len(years) - 1)
-
-    name_filter = st.text_input("Filter Municipality Name (contains)")
-
-    t = df[df["fy"] == year][
+@st.fragment
+def render_table_tab(df, modeled_rate, year_range_table):
+    # Fiscal years are limited to the sidebar range, defaulting to its latest year
+    fy_options = [y for y in years if year_range_table[0] <= y <= year_range_table[1]]
+    year = st.selectbox("Select Fiscal Year", fy_options, index=len(fy_options) - 1)
+
+    # Inside a form the filter only reruns the tab on Enter/Apply, not on every keystroke
+    with st.form("name_filter_form", border=False):
+        name_filter = st.text_input("Filter Municipality Name (contains)")
+        st.form_submit_button("Apply")
+    table_rows = st.selectbox("Show Top", ["All", 25, 50, 100, 250], key="table_rows")
+
+    t = with_modeled(table_slice(df, year, name_filter), modeled_rate)[
         ["local_government", "tax", "fy_total", "actual_rate", "modeled_collection", "forgone_revenue"]
-    ].copy()
-
-    if name_filter:
-        t = t[t["local_government"].str.contains(name_filter, case=False)]
+    ]
 
-    t = t.sort_values("forgone_revenue", ascending=False)
-    t["fy_total"] = t["fy_total"].round(0)
-    t["modeled_collection"] = t["modeled_collection"].round(0)
-    t["forgone_revenue"] = t["forgone_revenue"].round(0)
+    if table_rows == "All":
+        t = t.sort_values("forgone_revenue", ascending=False, kind="stable")
+    else:
+        # Partial selection instead of ordering the whole fiscal year
+        t = t.nlargest(table_rows, "forgone_revenue")
 
+    modeled_label = f"Modeled Collection ({modeled_rate:.1f}%)"
     t.columns = [
         "Local Government",
         "Tax",
         "Actual Collection",
         "Actual Rate (%)",
-        f"Modeled Collection ({modeled_rate:.1f}%)",
+        modeled_label,
         "Forgone Revenue",
     ]
 
-    st.dataframe(t, use_container_width=True, height=650)
+    st.dataframe(
+        t,
+        use_container_width=True,
+        height=650,
+        column_config={
+            "Actual Collection": st.column_config.NumberColumn(format="$%,.0f"),
+            "Actual Rate (%)": st.column_config.NumberColumn(format="%.2f%%"),
+            modeled_label: st.column_config.NumberColumn(format="$%,.0f"),
+            "Forgone Revenue": st.column_config.NumberColumn(format="$%,.0f"),
+        },
+    )
 
     st.download_button(
         f"Download FY{year} Table",
-        t.to_csv(index=False).encode("utf-8"),
+        lambda: to_csv_bytes(t, "table", year, name_filter, table_rows, modeled_rate),
         file_name=f"income_tax_LGDF_FY{year}.csv",
         mime="text/csv",
     )
 
 
+with tab_table:
+    render_table_tab(df, modeled_rate, year_range)
+
+
 # ===================================================
 # SOURCE / NOTES
 # ===================================================
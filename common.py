@@ -0,0 +1,227 @@
+"""Data loading and LGDF modeling helpers for the dashboard."""
+import csv
+import os
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+import streamlit as st
+
+# ---------------------------------------------------
+# ACTUAL EFFECTIVE LGDF RATES BY FISCAL YEAR
+# ---------------------------------------------------
+ACTUAL_EFFECTIVE_RATES = {
+    2012: 6.00,
+    2013: 6.00,
+    2014: 6.00,
+    2015: 6.00,
+    2016: 8.00,
+    2017: 8.00,
+    2018: 5.45,
+    2019: 5.75,
+    2020: 5.75,
+    2021: 6.06,
+    2022: 6.06,
+    2023: 6.16,
+    2024: 6.47,
+    2025: 6.47,
+}
+
+# Dense form of the table above for vectorized lookups: RATES_ARR[fy - FIRST_RATE_YEAR]
+FIRST_RATE_YEAR = min(ACTUAL_EFFECTIVE_RATES)
+RATES_ARR = np.array(
+    [ACTUAL_EFFECTIVE_RATES[y] for y in range(FIRST_RATE_YEAR, max(ACTUAL_EFFECTIVE_RATES) + 1)],
+    dtype=np.float64,
+)
+
+# ---------------------------------------------------
+# DATA LOADING
+# ---------------------------------------------------
+def read_source_csv(path):
+    # Normalize header names (as the pandas reader did) so re-exports with
+    # "FY" or " Local_Government " headers still resolve the columns below
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        header = [c.strip().lower() for c in next(csv.reader(f))]
+    tbl = pv.read_csv(
+        path,
+        read_options=pv.ReadOptions(column_names=header, skip_rows=1),
+        convert_options=pv.ConvertOptions(
+            include_columns=["local_government", "tax", "fy_total", "fy"],
+            column_types={"fy": pa.int32(), "fy_total": pa.float64()},
+        ),
+    )
+    # Keep only INC rows with usable numbers before anything is materialized in pandas
+    tax = pc.utf8_upper(pc.utf8_trim_whitespace(tbl["tax"]))
+    keep = pc.and_(
+        pc.equal(tax, "INC"),
+        pc.and_(pc.is_valid(tbl["fy"]), pc.is_valid(tbl["fy_total"])),
+    )
+    tbl = tbl.set_column(tbl.schema.get_field_index("tax"), "tax", tax)
+    tbl = tbl.set_column(
+        tbl.schema.get_field_index("local_government"),
+        "local_government",
+        pc.utf8_trim_whitespace(tbl["local_government"]),
+    )
+    df = tbl.filter(keep).to_pandas(types_mapper=pd.ArrowDtype)
+    df["local_government"] = df["local_government"].astype("category")
+    df["tax"] = df["tax"].astype("category")
+    df["fy"] = df["fy"].astype("int16")
+    # Dollar amounts stay float64 (float32 would lose whole dollars on the largest
+    # municipalities), but as a plain NumPy column so the math skips Arrow dispatch
+    df["fy_total"] = df["fy_total"].astype("float64")
+    # Fiscal-year-major order lets year filters slice with searchsorted (see year_slice)
+    return df.sort_values(["fy", "local_government"])
+
+
+@st.cache_data
+def load_data(path):
+    """Load the cleaned frame, reusing a sibling Parquet copy when it is newer than the CSV.
+
+    Returns ``(df, municipalities, years, min_year, max_year)`` so the widget option
+    lists are built once per load rather than on every rerun.
+    """
+    parquet_path = path.with_suffix(".parquet")
+    # Editing this module can change the cleaned schema, so it invalidates the copy too
+    source_mtime = max(path.stat().st_mtime, Path(__file__).stat().st_mtime)
+    if parquet_path.exists() and parquet_path.stat().st_mtime >= source_mtime:
+        df = pd.read_parquet(parquet_path)
+    else:
+        df = read_source_csv(path)
+        # Write beside the target and rename over it, so a crash mid-write never
+        # leaves a truncated copy that looks newer than the CSV
+        tmp_path = parquet_path.with_name(f"{path.stem}.{os.getpid()}.tmp.parquet")
+        try:
+            df.to_parquet(tmp_path, engine="pyarrow", compression="zstd")
+            os.replace(tmp_path, parquet_path)
+        except OSError:
+            # Read-only deployments just fall back to parsing the CSV each cold start
+            tmp_path.unlink(missing_ok=True)
+
+    min_year = int(df["fy"].iloc[0])
+    max_year = int(df["fy"].iloc[-1])
+    # An out-of-table year would wrap or overflow the RATES_ARR gather below
+    last_rate_year = FIRST_RATE_YEAR + len(RATES_ARR) - 1
+    if min_year < FIRST_RATE_YEAR or max_year > last_rate_year:
+        raise ValueError(
+            f"Data covers FY{min_year}-FY{max_year}, but ACTUAL_EFFECTIVE_RATES only covers "
+            f"FY{FIRST_RATE_YEAR}-FY{last_rate_year}"
+        )
+    df["actual_rate"] = RATES_ARR[df["fy"].to_numpy() - FIRST_RATE_YEAR]
+
+    municipalities = df["local_government"].cat.categories.tolist()
+    years = list(range(min_year, max_year + 1))
+    return df, municipalities, years, min_year, max_year
+
+
+def with_modeled(view, modeled_rate):
+    """Return a copy of ``view`` with modeled_collection and forgone_revenue at the modeled rate.
+
+    Applied to the rows a tab actually shows, so a rate change never touches the full frame.
+    """
+    fy_total = view["fy_total"].to_numpy()
+    modeled = fy_total * (modeled_rate / view["actual_rate"].to_numpy())
+    return view.assign(
+        modeled_collection=np.maximum(fy_total, modeled),
+        forgone_revenue=np.maximum(modeled - fy_total, 0.0),
+    )
+
+
+@st.cache_data(max_entries=32)
+def to_csv_bytes(_frame, *view_key):
+    """CSV payload for a download button, serialized once per ``view_key``.
+
+    ``view_key`` must be the inputs that determine ``_frame`` (tab name, filters,
+    modeled rate); the frame itself is not hashed. The cache is bounded because
+    keys include free-text name filters and every municipality x range x rate.
+    """
+    return _frame.to_csv(index=False).encode("utf-8")
+
+
+def year_slice(dataframe, yr_lo, yr_hi):
+    """Rows with yr_lo <= fy <= yr_hi, located by binary search on the fy-sorted frame."""
+    fy = dataframe["fy"].to_numpy()
+    lo_i = np.searchsorted(fy, yr_lo, side="left")
+    hi_i = np.searchsorted(fy, yr_hi, side="right")
+    return dataframe.iloc[lo_i:hi_i]
+
+
+# ---------------------------------------------------
+# VIEWS AND AGGREGATES
+# ---------------------------------------------------
+@st.cache_data
+def yearly_totals(_df, modeled_rate):
+    """Statewide totals per fiscal year at the modeled rate (one row per year)."""
+    agg = with_modeled(_df, modeled_rate).groupby("fy", as_index=False).agg(
+        fy_total=("fy_total", "sum"),
+        modeled_collection=("modeled_collection", "sum"),
+        forgone_revenue=("forgone_revenue", "sum"),
+    )
+    agg["actual_rate"] = RATES_ARR[agg["fy"].to_numpy() - FIRST_RATE_YEAR]
+    agg["local_government"] = "All Municipalities"
+    return agg
+
+
+@st.cache_resource(show_spinner=False)
+def muni_groups(_df):
+    """Each municipality's rows keyed by name, split once and shared read-only across sessions."""
+    return dict(tuple(_df.groupby("local_government", sort=False, observed=True)))
+
+
+def muni_slice(dataframe, muni, yr_lo, yr_hi):
+    """One municipality's rows for the year range, sliced out of its cached group."""
+    # Groups keep the frame's fy-major order, so each one is fy-sorted too
+    return year_slice(muni_groups(dataframe)[muni], yr_lo, yr_hi)
+
+
+@st.cache_resource(show_spinner=False)
+def lowercase_names(_df):
+    """Lower-cased municipality names as a fixed-width string array, aligned with the category codes."""
+    return np.char.lower(_df["local_government"].cat.categories.to_numpy().astype(str))
+
+
+def table_slice(dataframe, year, name_filter):
+    """Rows for one fiscal year whose municipality contains ``name_filter`` (case-insensitive)."""
+    t = year_slice(dataframe, year, year)
+    if name_filter:
+        # Literal substring search over the ~1.4k distinct names, mapped back to rows by code
+        hits = np.char.find(lowercase_names(dataframe), name_filter.lower()) >= 0
+        t = t[hits[t["local_government"].cat.codes.to_numpy()]]
+    return t
+
+
+def filter_data(dataframe, muni, year_range, modeled_rate):
+    """Filter by municipality and year range. If 'All Municipalities', slice the cached yearly totals."""
+    if muni == "All Municipalities":
+        return year_slice(yearly_totals(dataframe, modeled_rate), year_range[0], year_range[1])
+    return with_modeled(muni_slice(dataframe, muni, year_range[0], year_range[1]), modeled_rate)
+
+
+def impact_totals(view):
+    """Forgone revenue over the latest 1, 3 and 5 fiscal years in the view, plus the overall total."""
+    # Views come off the fy-major frame (or the fy groupby), so they are already fy-ascending
+    fg = view["forgone_revenue"].to_numpy()[::-1]
+    if fg.size == 0:
+        return 0, 0, 0, 0
+    cum = np.cumsum(fg)
+    return fg[0], cum[min(2, fg.size - 1)], cum[min(4, fg.size - 1)], cum[-1]
+
+
+@st.cache_data
+def top_totals(_df, yr_lo, yr_hi, modeled_rate):
+    """Per-municipality totals over the year range at the modeled rate, largest forgone revenue first."""
+    filtered = with_modeled(year_slice(_df, yr_lo, yr_hi), modeled_rate)
+    # One weighted bincount per measure over the category codes instead of a groupby
+    names = _df["local_government"].cat.categories
+    codes = filtered["local_government"].cat.codes.to_numpy()
+    totals = pd.DataFrame(
+        {
+            "local_government": names,
+            "total_actual": np.bincount(codes, filtered["fy_total"].to_numpy(), len(names)),
+            "total_modeled": np.bincount(codes, filtered["modeled_collection"].to_numpy(), len(names)),
+            "total_forgone": np.bincount(codes, filtered["forgone_revenue"].to_numpy(), len(names)),
+        }
+    )
+    observed = np.bincount(codes, minlength=len(names)) > 0
+    return totals[observed].reset_index(drop=True).sort_values("total_forgone", ascending=False)